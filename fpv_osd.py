@@ -6,14 +6,13 @@ import fnmatch
 
 import cv2
 import staticmaps
-import numpy as np
-from PIL import Image, ImageDraw, ImageFont
+from PIL import ImageFont
 from tqdm.auto import tqdm
-from dynamic_map import altitude_mapping, apply_intermediate_zoom_pil
+from osd_widgets import (OsdCompositor, MapWidget, MapOverlayWidget, HeadingTapeWidget, AltitudeWidget,
+                         SpeedWidget, HomeDistanceWidget, CameraWidget)
 
 from srt_reader import SrtReader
 
-RGB_COLOR = (255, 255, 255)
 OSD_SCALE = 3
 LINE_STYLE = cv2.LINE_AA
 OSD_FONT = cv2.FONT_HERSHEY_SIMPLEX
@@ -32,6 +31,7 @@ def get_system_font(size=50):
 
 
 font = get_system_font()
+small_font = get_system_font(35)
 
 tile_provider_OpenTopoMap = staticmaps.TileProvider(
     "opentopomap",
@@ -84,63 +84,19 @@ def read_frames(mp4_file_list):
         cap.release()
 
 
-def write_osd_to_frame(frame, frame_osd, osd_direction):
-    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    pil_frame = Image.fromarray(frame)
-
-    draw = ImageDraw.Draw(pil_frame)
-    drone_speed = f"{frame_osd.speed} m/s".ljust(7)
-    drone_alt = f"{frame_osd.height} m".ljust(5)
-    frame_direction = osd_direction
-
-    draw.text((3610, 610-50), f"↨{drone_alt}", fill=RGB_COLOR, font=font, stroke_width=3, stroke_fill=(0, 0, 0))
-    draw.text((3160, 610-50), f"→{drone_speed}", fill=RGB_COLOR, font=font, stroke_width=3, stroke_fill=(0, 0, 0))
-
-    # Add map
+def create_osd_widgets():
     map_r = 250
     map_x, map_y = (3230, 110)
-    tile_context.set_center(staticmaps.create_latlng(frame_osd.lat, frame_osd.long))
-    zoom_level, intermediate_scale = altitude_mapping(frame_osd.rt_height)
-    tile_context.set_zoom(zoom_level)
-    image = tile_context.render_pillow(map_r*2, map_r*2)
-    map_image = apply_intermediate_zoom_pil(image, intermediate_scale)
-    map_image = map_image.rotate(frame_direction + 180)
-
-    # Create a linear gradient mask
-    mask = Image.new("L", map_image.size, 0)
-    eclipse_draw = ImageDraw.Draw(mask)
-    eclipse_draw.ellipse(((0, 0), (map_r*2, map_r*2)), fill=255)
-    map_image.putalpha(mask)
-
-    pil_frame = pil_frame.convert("RGBA")
-    pil_frame = pil_frame.convert(map_image.mode)
-    pil_frame.alpha_composite(map_image, (map_x, map_y))
-    frame_with_text = np.array(pil_frame)
-
-    # cursor acting like drone position
-    cx, cy = (map_x + map_r, map_y + map_r)
-    size_y = 40
-    size_x = 30
-    border_inner = 4
-
-    triangle_points = np.array([
-        (cx, cy - size_y),
-        (cx - size_x, cy + size_y),
-        (cx, cy + size_y/2),
-        (cx + size_x, cy + size_y)
-    ], np.int32)
-
-    cv2.fillPoly(frame_with_text, [triangle_points], color=(255, 255, 255))
-    white_border = triangle_points + [[0, border_inner],
-                                      [border_inner, -border_inner],
-                                      [0, -border_inner],
-                                      [-border_inner, -border_inner]]
-    cv2.fillPoly(frame_with_text, [white_border], color=(0, 0, 0))
-
-    # white circle around map
-    cv2.circle(frame_with_text, (map_x+map_r, map_y+map_r), map_r, (255, 255, 255), 3)
-
-    return cv2.cvtColor(frame_with_text, cv2.COLOR_RGB2BGR)
+    # widgets are drawn in list order, map and ring go over the readouts
+    return [
+        AltitudeWidget((3610, 610-50), font),
+        SpeedWidget((3160, 610-50), font),
+        MapWidget((map_x, map_y), tile_context, map_r),
+        MapOverlayWidget((map_x, map_y), map_r),
+        HeadingTapeWidget((map_x, 30), small_font, width=map_r*2),
+        HomeDistanceWidget((3160, 680-50), font),
+        CameraWidget((3160, 750-50), small_font),
+    ]
 
 
 def write_osd_to_file(mp4_list, srt_list):
@@ -159,8 +115,9 @@ def write_osd_to_file(mp4_list, srt_list):
 
     osd_directions = SrtReader(srt_list).get_smooth_direction_array()
     osd_data = SrtReader(srt_list).frame_details_new()
+    compositor = OsdCompositor(create_osd_widgets())
     for frame, osd_text, osd_direction in zip(read_frames(mp4_list), osd_data, osd_directions):
-        out.write(write_osd_to_frame(frame, osd_text, osd_direction))
+        out.write(compositor.draw(frame, osd_text, osd_direction))
 
     out.release()
 
@@ -175,8 +132,9 @@ def check_osd(video_file):
     ret, frame = cap.read()
     if ret:
         osd_data = FrameOsd(height=120, rt_height=12.3, speed=25, home_distance=1,
-                            lat=50.041159, long=20.809571, iso_time=datetime.now(), direction_vector=[90])
-        frame_with_text = write_osd_to_frame(frame, osd_data, 90)
+                            lat=50.041159, long=20.809571, iso_time=datetime.now(), iso="100", shutter="1/500.0",
+                            direction_vector=[90])
+        frame_with_text = OsdCompositor(create_osd_widgets()).draw(frame, osd_data, 90)
         cv2.imshow('Frame', frame_with_text)
         while cv2.waitKey(25) & 0xFF != ord('q'):
             pass
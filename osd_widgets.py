@@ -0,0 +1,258 @@
+import math
+
+import cv2
+import staticmaps
+import numpy as np
+from PIL import Image, ImageDraw
+
+from dynamic_map import altitude_mapping, apply_intermediate_zoom_pil
+
+RGB_COLOR = (255, 255, 255)
+STROKE_COLOR = (0, 0, 0)
+STROKE_WIDTH = 3
+
+
+class Widget:
+    """
+    Single OSD element drawn at a fixed position of the frame.
+    `fields` lists telemetry values the widget depends on, the compositor
+    calls `render` again only when one of them changes.
+    """
+    fields = ()
+
+    def __init__(self, position):
+        self.position = position
+
+    def state(self, telemetry):
+        return tuple(telemetry[name] for name in self.fields)
+
+    def render(self, state):
+        """
+        Returns RGBA PIL image and its (x, y) offset from widget position,
+        or None when there is nothing to draw.
+        """
+        raise NotImplementedError
+
+
+class TextWidget(Widget):
+    def __init__(self, position, font):
+        super().__init__(position)
+        self.font = font
+
+    def text(self, *values):
+        raise NotImplementedError
+
+    def render(self, state):
+        text = self.text(*state)
+        if not text:
+            return None
+        left, top, right, bottom = self.font.getbbox(text, stroke_width=STROKE_WIDTH)
+        image = Image.new("RGBA", (right - left, bottom - top), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        draw.text((-left, -top), text, fill=RGB_COLOR, font=self.font,
+                  stroke_width=STROKE_WIDTH, stroke_fill=STROKE_COLOR)
+        return image, (left, top)
+
+
+class SpeedWidget(TextWidget):
+    fields = ("speed",)
+
+    def text(self, speed):
+        return "→" + f"{speed} m/s".ljust(7)
+
+
+class AltitudeWidget(TextWidget):
+    fields = ("height",)
+
+    def text(self, height):
+        return "↨" + f"{height} m".ljust(5)
+
+
+class HomeDistanceWidget(TextWidget):
+    fields = ("home_distance",)
+
+    def text(self, home_distance):
+        return f"⌂{home_distance} m"
+
+
+class CameraWidget(TextWidget):
+    fields = ("iso", "shutter")
+
+    def text(self, iso, shutter):
+        if not iso and not shutter:
+            return ""
+        return f"ISO {iso}  {shutter}"
+
+
+class MapWidget(Widget):
+    fields = ("lat", "long", "rt_height", "direction")
+
+    def __init__(self, position, context, radius=250):
+        super().__init__(position)
+        self.context = context
+        self.radius = radius
+        self.mask = Image.new("L", (radius*2, radius*2), 0)
+        ImageDraw.Draw(self.mask).ellipse(((0, 0), (radius*2, radius*2)), fill=255)
+        self.tiles_key = None
+        self.tiles = None
+
+    def state(self, telemetry):
+        # quantize position to what the map can show, so tiles are rendered only when the picture changes
+        zoom_level, intermediate_scale = altitude_mapping(telemetry["rt_height"])
+        long_step = 360. / (256 * 2 ** zoom_level)  # degrees per map pixel
+        lat_step = long_step * math.cos(math.radians(round(telemetry["lat"])))
+        return (round(telemetry["lat"] / lat_step) * lat_step,
+                round(telemetry["long"] / long_step) * long_step,
+                zoom_level,
+                round(intermediate_scale, 2),
+                telemetry["direction"])
+
+    def render_tiles(self, lat, long, zoom_level, intermediate_scale):
+        self.context.set_center(staticmaps.create_latlng(lat, long))
+        self.context.set_zoom(zoom_level)
+        image = self.context.render_pillow(self.radius*2, self.radius*2)
+        return apply_intermediate_zoom_pil(image, intermediate_scale)
+
+    def render(self, state):
+        # heading only rotates cached tiles, which is much cheaper than rendering them
+        tiles_key, direction = state[:4], state[4]
+        if tiles_key != self.tiles_key:
+            self.tiles_key = tiles_key
+            self.tiles = self.render_tiles(*tiles_key)
+        map_image = self.tiles.rotate(direction + 180)
+        map_image.putalpha(self.mask)
+        return map_image.convert("RGBA"), (0, 0)
+
+
+class MapOverlayWidget(Widget):
+    """Cursor acting like drone position and white circle around the map."""
+
+    def __init__(self, position, radius=250):
+        super().__init__(position)
+        self.radius = radius
+
+    def render(self, state):
+        margin = 3  # ring is 3 px thick
+        size = self.radius*2 + margin*2
+        overlay = np.zeros((size, size, 4), np.uint8)
+
+        cx, cy = (self.radius + margin, self.radius + margin)
+        size_y = 40
+        size_x = 30
+        border_inner = 4
+
+        triangle_points = np.array([
+            (cx, cy - size_y),
+            (cx - size_x, cy + size_y),
+            (cx, cy + size_y/2),
+            (cx + size_x, cy + size_y)
+        ], np.int32)
+
+        cv2.fillPoly(overlay, [triangle_points], color=(255, 255, 255, 255))
+        white_border = triangle_points + [[0, border_inner],
+                                          [border_inner, -border_inner],
+                                          [0, -border_inner],
+                                          [-border_inner, -border_inner]]
+        cv2.fillPoly(overlay, [white_border], color=(0, 0, 0, 255))
+
+        cv2.circle(overlay, (cx, cy), self.radius, (255, 255, 255, 255), 3)
+        return Image.fromarray(overlay, "RGBA"), (-margin, -margin)
+
+
+class HeadingTapeWidget(Widget):
+    fields = ("direction",)
+    labels = {0: "N", 45: "NE", 90: "E", 135: "SE", 180: "S", 225: "SW", 270: "W", 315: "NW"}
+
+    def __init__(self, position, font, width=500, height=70, span=90):
+        super().__init__(position)
+        self.font = font
+        self.width = width
+        self.height = height
+        self.span = span
+
+    def state(self, telemetry):
+        # srt direction points backwards, tape is redrawn once per full degree
+        return (int(round(telemetry["direction"] + 180)) % 360,)
+
+    def visible_labels(self, draw, heading):
+        """Returns (label, position) of compass labels whose whole text fits inside the tape."""
+        px_per_deg = self.width / self.span
+        visible = []
+        for angle, label in self.labels.items():
+            offset = (angle - heading + 180) % 360 - 180
+            x = self.width / 2 + offset * px_per_deg
+            position = (x, self.height - 22)
+            left, _, right, _ = draw.textbbox(position, label, font=self.font, anchor="ms",
+                                              stroke_width=STROKE_WIDTH)
+            if 0 <= left and right <= self.width:
+                visible.append((label, position))
+        return visible
+
+    def render(self, state):
+        heading, = state
+        image = Image.new("RGBA", (self.width, self.height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        px_per_deg = self.width / self.span
+        center = self.width / 2
+
+        first = (heading - self.span // 2) // 5 * 5
+        for angle in range(first, heading + self.span // 2 + 5, 5):
+            x = center + (angle - heading) * px_per_deg
+            if not 0 <= x < self.width:
+                continue
+            tick = 20 if angle % 15 == 0 else 10
+            draw.line(((x, self.height - tick), (x, self.height)), fill=RGB_COLOR, width=3)
+
+        for label, position in self.visible_labels(draw, heading):
+            draw.text(position, label, fill=RGB_COLOR, font=self.font, anchor="ms",
+                      stroke_width=STROKE_WIDTH, stroke_fill=STROKE_COLOR)
+
+        draw.polygon(((center - 10, 0), (center + 10, 0), (center, 14)), fill=RGB_COLOR)
+        return image, (0, 0)
+
+
+class OsdCompositor:
+    """
+    Keeps rasterized widgets in BGR cache and blits them into each frame.
+    Widget is rendered again only when its telemetry state changes.
+    """
+
+    def __init__(self, widgets):
+        self.widgets = widgets
+        self.states = [None] * len(widgets)
+        self.cache = [None] * len(widgets)
+
+    @staticmethod
+    def to_cache(rendered, position):
+        if rendered is None:
+            return None
+        image, (dx, dy) = rendered
+        bgra = cv2.cvtColor(np.array(image), cv2.COLOR_RGBA2BGRA)
+        alpha = bgra[:, :, 3:].astype(np.uint16)
+        premultiplied = bgra[:, :, :3].astype(np.uint16) * alpha
+        return position[0] + dx, position[1] + dy, premultiplied, 255 - alpha
+
+    @staticmethod
+    def blit(frame, cached):
+        x, y, premultiplied, inv_alpha = cached
+        height, width = frame.shape[:2]
+        x0, y0 = max(x, 0), max(y, 0)
+        x1 = min(x + premultiplied.shape[1], width)
+        y1 = min(y + premultiplied.shape[0], height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        src = np.s_[y0 - y:y1 - y, x0 - x:x1 - x]
+        roi = frame[y0:y1, x0:x1]
+        blended = roi * inv_alpha[src] + premultiplied[src]
+        roi[:] = (blended + 127) // 255
+
+    def draw(self, frame, frame_osd, direction):
+        telemetry = dict(vars(frame_osd), direction=direction)
+        for idx, widget in enumerate(self.widgets):
+            state = widget.state(telemetry)
+            if self.states[idx] != state:
+                self.states[idx] = state
+                self.cache[idx] = self.to_cache(widget.render(state), widget.position)
+            if self.cache[idx] is not None:
+                self.blit(frame, self.cache[idx])
+        return frame
@@ -44,6 +44,8 @@ class FrameOsd:
     lat: float = 0.0
     long: float = 0.0
     iso_time: datetime = 0.0
+    iso: str = ""
+    shutter: str = ""
     direction_vector: list = field(default_factory=lambda: [180.]*30)
 
     @property
@@ -166,6 +168,8 @@ class SrtReader:
         self.current_osd.lat = buffer[-1].gps[0]
         self.current_osd.long = buffer[-1].gps[1]
         self.current_osd.iso_time = buffer[-1].iso_time
+        self.current_osd.iso = buffer[-1].iso
+        self.current_osd.shutter = buffer[-1].shutter
         self.current_osd.rt_height = mean([self.fix_altitude(b.gps[2]) for b in buffer])
 
         if idx % 30 == 0 and idx >= 30:
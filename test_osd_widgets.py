@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from osd_widgets import Widget, OsdCompositor, HeadingTapeWidget, MapWidget
+
+
+class ImageWidget(Widget):
+    fields = ("value",)
+
+    def __init__(self, position, image, offset=(0, 0)):
+        super().__init__(position)
+        self.image = image
+        self.offset = offset
+        self.render_count = 0
+
+    def render(self, state):
+        self.render_count += 1
+        return self.image, self.offset
+
+
+def random_rgba(rng, width, height):
+    return Image.fromarray(rng.integers(0, 256, (height, width, 4), dtype=np.uint8), "RGBA")
+
+
+def alpha_composite_bgr(frame, widgets):
+    background = Image.fromarray(frame[:, :, ::-1]).convert("RGBA")
+    for widget in widgets:
+        x, y = widget.position[0] + widget.offset[0], widget.position[1] + widget.offset[1]
+        layer = Image.new("RGBA", background.size, (0, 0, 0, 0))
+        layer.paste(widget.image, (x, y))
+        background = Image.alpha_composite(background, layer)
+    return np.array(background.convert("RGB"))[:, :, ::-1]
+
+
+def test_draw_matches_alpha_composite():
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (120, 160, 3), dtype=np.uint8)
+    widgets = [
+        ImageWidget((10, 20), random_rgba(rng, 50, 40)),
+        ImageWidget((30, 30), random_rgba(rng, 40, 40), offset=(-5, -5)),
+        ImageWidget((140, 100), random_rgba(rng, 40, 40)),  # past right and bottom edge
+        ImageWidget((-10, -15), random_rgba(rng, 30, 30)),  # past left and top edge
+    ]
+
+    expected = alpha_composite_bgr(frame, widgets)
+    result = OsdCompositor(widgets).draw(frame.copy(), SimpleNamespace(value=1), 0)
+
+    assert np.abs(result.astype(int) - expected.astype(int)).max() <= 1
+
+
+def test_opaque_pixels_are_copied_exactly():
+    frame = np.zeros((20, 20, 3), np.uint8)
+    widget = ImageWidget((5, 5), Image.new("RGBA", (10, 10), (10, 20, 30, 255)))
+
+    result = OsdCompositor([widget]).draw(frame, SimpleNamespace(value=1), 0)
+
+    assert (result[5:15, 5:15] == (30, 20, 10)).all()
+    assert (result[:5] == 0).all()
+
+
+def test_widget_rendered_only_when_fields_change():
+    widget = ImageWidget((0, 0), Image.new("RGBA", (4, 4), (255, 255, 255, 255)))
+    compositor = OsdCompositor([widget])
+    frame = np.zeros((8, 8, 3), np.uint8)
+
+    for value in (1, 1, 1, 2, 2):
+        compositor.draw(frame.copy(), SimpleNamespace(value=value), 0)
+
+    assert widget.render_count == 2
+
+
+def test_heading_tape_labels_not_clipped():
+    try:
+        font = ImageFont.truetype("DejaVuSans.ttf", 35)
+    except OSError:
+        pytest.skip("DejaVuSans font not available")
+    tape = HeadingTapeWidget((0, 0), font)
+    label_rows = np.s_[:tape.height - 25]  # above the tick marks
+
+    for heading in range(0, 360, 45):
+        image, _ = tape.render((heading,))
+        alpha = np.array(image)[label_rows][:, :, 3]
+        labels = [label for label, _ in tape.visible_labels(ImageDraw.Draw(image), heading)]
+
+        assert labels == [tape.labels[heading]]
+        assert not alpha[:, 0].any() and not alpha[:, -1].any()
+
+
+def test_map_rotation_reuses_rendered_tiles():
+    class Context:
+        renders = 0
+
+        def set_center(self, center):
+            pass
+
+        def set_zoom(self, zoom):
+            pass
+
+        def render_pillow(self, width, height):
+            Context.renders += 1
+            return Image.new("RGBA", (width, height), (0, 128, 0, 255))
+
+    compositor = OsdCompositor([MapWidget((0, 0), Context(), radius=20)])
+    frame = np.zeros((50, 50, 3), np.uint8)
+    osd = SimpleNamespace(lat=50.041159, long=20.809571, rt_height=3.0)
+
+    for direction in (90.0, 90.3, 91.7, 135.2):
+        compositor.draw(frame.copy(), osd, direction)
+
+    assert Context.renders == 1